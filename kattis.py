@@ -1,9 +1,11 @@
+import re
 import sys
 
 from configparser import ConfigParser
-from collections.abc import Iterable
-from functools import total_ordering
+from collections.abc import Iterable, Mapping
+from functools import cached_property
 from pathlib import Path
+from types import MappingProxyType
 from typing import Literal
 
 from requests import Request
@@ -19,74 +21,132 @@ type ProblemTab = Literal['edit', 'metadata', 'submissions']
 
 type ContestTab = Literal['contest', 'standings', 'problems', 'teams', 'rules']
 
+# Shared read-only stand-in for omitted request data/params
+_EMPTY_DICT: Mapping[str, str] = MappingProxyType({})
+
+# Parsed configs keyed by the files consulted, with their mtimes when parsed, so unchanged files aren't reparsed
+# Entries are read-only since they're shared between Kattis instances
+_CFG_CACHE: dict[tuple[Path, ...], tuple[tuple[int | None, ...], Mapping[tuple[str, str], str]]] = {}
+
 
-@total_ordering
 class Contest:
+    __slots__ = ('kattis', 'id', '_hash')
+
     def __init__(self, kattis: 'Kattis', id: str):
         self.kattis = kattis
-        self.id = id
+        self.id = sys.intern(id)
+        self._hash = hash(self.id)
 
     def __str__(self):
         return self.id
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
 
     def __eq__(self, other: object):
-        return isinstance(other, Contest) and str(self) == str(other)
+        return type(other) is Contest and self.id == other.id
 
     def __lt__(self, other: object):
-        if not isinstance(other, Contest):
-            raise TypeError()
-        return str(self) < str(other)
+        if type(other) is not Contest:
+            return NotImplemented
+        return self.id < other.id
+
+    def __le__(self, other: object):
+        if type(other) is not Contest:
+            return NotImplemented
+        return self.id <= other.id
+
+    def __gt__(self, other: object):
+        if type(other) is not Contest:
+            return NotImplemented
+        return self.id > other.id
+
+    def __ge__(self, other: object):
+        if type(other) is not Contest:
+            return NotImplemented
+        return self.id >= other.id
 
     def url(self):
         return self.kattis.contest_url(self)
 
 
-@total_ordering
 class Submission:
+    __slots__ = ('kattis', 'id', '_hash')
+
     def __init__(self, kattis: 'Kattis', id: str):
         self.kattis = kattis
-        self.id = id
+        self.id = sys.intern(id)
+        self._hash = hash(self.id)
 
     def __str__(self):
         return self.id
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
 
     def __eq__(self, other: object):
-        return isinstance(other, Submission) and str(self) == str(other)
+        return type(other) is Submission and self.id == other.id
 
     def __lt__(self, other: object):
-        if not isinstance(other, Submission):
-            raise TypeError()
-        return str(self) < str(other)
+        if type(other) is not Submission:
+            return NotImplemented
+        return self.id < other.id
+
+    def __le__(self, other: object):
+        if type(other) is not Submission:
+            return NotImplemented
+        return self.id <= other.id
+
+    def __gt__(self, other: object):
+        if type(other) is not Submission:
+            return NotImplemented
+        return self.id > other.id
+
+    def __ge__(self, other: object):
+        if type(other) is not Submission:
+            return NotImplemented
+        return self.id >= other.id
 
     def url(self, contest: Contest | str | None = None):
         return self.kattis.submission_url(self, contest)
 
 
-@total_ordering
 class Problem:
+    __slots__ = ('kattis', 'name', '_hash')
+
     def __init__(self, kattis: 'Kattis', name: str):
         self.kattis = kattis
-        self.name = name
+        self.name = sys.intern(name)
+        self._hash = hash(self.name)
 
     def __str__(self):
         return self.name
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
 
     def __eq__(self, other: object):
-        return isinstance(other, Problem) and str(self) == str(other)
+        return type(other) is Problem and self.name == other.name
 
     def __lt__(self, other: object):
-        if not isinstance(other, Problem):
-            raise TypeError()
-        return str(self) < str(other)
+        if type(other) is not Problem:
+            return NotImplemented
+        return self.name < other.name
+
+    def __le__(self, other: object):
+        if type(other) is not Problem:
+            return NotImplemented
+        return self.name <= other.name
+
+    def __gt__(self, other: object):
+        if type(other) is not Problem:
+            return NotImplemented
+        return self.name > other.name
+
+    def __ge__(self, other: object):
+        if type(other) is not Problem:
+            return NotImplemented
+        return self.name >= other.name
 
     def url(self, contest: Contest | str | None = None):
         return self.kattis.problem_url(self, contest)
@@ -95,25 +155,42 @@ class Problem:
         return self.kattis.problem_statistics_url(self, contest)
 
 
-@total_ordering
 class User:
+    __slots__ = ('kattis', 'name', '_hash')
+
     def __init__(self, kattis: 'Kattis', name: str):
         self.kattis = kattis
-        self.name = name
+        self.name = sys.intern(name)
+        self._hash = hash(self.name)
 
     def __str__(self):
         return self.name
 
     def __hash__(self):
-        return hash(str(self))
+        return self._hash
 
     def __eq__(self, other: object):
-        return isinstance(other, User) and str(self) == str(other)
+        return type(other) is User and self.name == other.name
 
     def __lt__(self, other: object):
-        if not isinstance(other, User):
-            raise TypeError()
-        return str(self) < str(other)
+        if type(other) is not User:
+            return NotImplemented
+        return self.name < other.name
+
+    def __le__(self, other: object):
+        if type(other) is not User:
+            return NotImplemented
+        return self.name <= other.name
+
+    def __gt__(self, other: object):
+        if type(other) is not User:
+            return NotImplemented
+        return self.name > other.name
+
+    def __ge__(self, other: object):
+        if type(other) is not User:
+            return NotImplemented
+        return self.name >= other.name
 
     def url(self):
         return self.kattis.user_url(self)
@@ -136,23 +213,86 @@ class Kattis:
             file = sys.orig_argv[0]
 
         file = Path(file)
-        dirs = [Path('~').expanduser(), file.parent, file.resolve().parent]
-        return [p / Kattis.CONFIG_FILENAME for p in dirs]
+        dirs = [Path('~').expanduser(), file.parent]
+        if file.is_symlink():
+            dirs.append(file.resolve().parent)
+        return [p / Kattis.CONFIG_FILENAME for p in dict.fromkeys(dirs)]
+
+    _SECTION_RE = re.compile(r'\[([^\]]+)\]')
+    _OPTION_RE = re.compile(r'([^:=\s][^:=]*?)\s*[:=]\s*(.*?)')
 
     @staticmethod
-    def _read_config(paths: Iterable[Path]) -> ConfigParser:
-        # See cli.get_config
-        cfg = ConfigParser()
-        if Kattis.DEFAULT_CONFIG.is_file():
-            cfg.read(Kattis.DEFAULT_CONFIG)
+    def _parse_config_fast(text: str, cfg: dict[tuple[str, str], str]) -> bool:
+        # Handles the plain [section] / key: value subset that .kattisrc files use.
+        # Returns False on anything else (continuations, DEFAULT, interpolation, duplicates, ...) so the caller
+        # can fall back to ConfigParser, which handles or rejects those.
+        section = None
+        seen: set[tuple[str, str | None]] = set()
+        for line in text.splitlines():
+            if not line.strip() or line.lstrip()[0] in '#;':
+                continue
+            if line[0].isspace():
+                return False
+            line = line.rstrip()
+            if line[0] == '[':
+                # ConfigParser reads anything starting with a [header] as a section, e.g. '[k]=v'
+                if not (m := Kattis._SECTION_RE.fullmatch(line)):
+                    return False
+                section = m[1]
+                if section == 'DEFAULT' or (section, None) in seen:
+                    return False
+                seen.add((section, None))
+            elif section is not None and (m := Kattis._OPTION_RE.fullmatch(line)) and '%' not in m[2]:
+                key = (section, m[1].lower())
+                if key in seen:
+                    return False
+                seen.add(key)
+                cfg[key] = m[2]
+            else:
+                return False
+        return True
 
-        if not cfg.read(paths):
+    @staticmethod
+    def _read_config(paths: Iterable[Path]) -> Mapping[tuple[str, str], str]:
+        # See cli.get_config
+        paths = list(paths)
+
+        def mtime(path: Path):
+            try:
+                return path.stat().st_mtime_ns
+            except OSError:
+                return None
+
+        cache_key = (Kattis.DEFAULT_CONFIG, *paths)
+        mtimes = tuple(mtime(p) for p in cache_key)
+        if cache_key in _CFG_CACHE and _CFG_CACHE[cache_key][0] == mtimes:
+            return _CFG_CACHE[cache_key][1]
+
+        def read_texts(paths: Iterable[Path]):
+            texts: list[str] = []
+            for path in paths:
+                try:
+                    texts.append(path.read_text())
+                except OSError:
+                    pass
+            return texts
+
+        texts = read_texts(paths)
+        if not texts:
             raise cli.ConfigError()
+        texts = read_texts([Kattis.DEFAULT_CONFIG]) + texts
 
-        if not cfg.has_option('kattis', 'hostname'):
-            cfg.set('kattis', 'hostname', 'open.kattis.com')
+        cfg: dict[tuple[str, str], str] = {}
+        if not all(Kattis._parse_config_fast(text, cfg) for text in texts):
+            parser = ConfigParser()
+            for text in texts:
+                parser.read_string(text)
+            # Raw values: like ConfigParser, only interpolate an option when it's actually read (see get_cfg)
+            cfg = {(s, k): v for s in parser.sections() for k, v in parser.items(s, raw=True)}
 
-        return cfg
+        cfg.setdefault(('kattis', 'hostname'), 'open.kattis.com')
+        _CFG_CACHE[cache_key] = (mtimes, MappingProxyType(cfg))
+        return _CFG_CACHE[cache_key][1]
 
     def __init__(self, cfg_paths: Path | Iterable[Path] | None = None):
         if cfg_paths is None:
@@ -161,19 +301,43 @@ class Kattis:
             cfg_paths = [cfg_paths]
         else:
             cfg_paths = list(cfg_paths)
-        self.config = Kattis._read_config(cfg_paths)
+        self._cfg_paths = cfg_paths
+
+    @cached_property
+    def _cfg(self):
+        # Flattened (section, option) -> raw value, read on first use
+        return Kattis._read_config(self._cfg_paths)
+
+    @cached_property
+    def config(self):
+        # Full ConfigParser view of the same files (see cli.get_config), only built when something asks for it
+        cfg = ConfigParser()
+        if Kattis.DEFAULT_CONFIG.is_file():
+            cfg.read(Kattis.DEFAULT_CONFIG)
+        if not cfg.read(self._cfg_paths):
+            raise cli.ConfigError()
+        if not cfg.has_section('kattis'):
+            cfg.add_section('kattis')
+        if not cfg.has_option('kattis', 'hostname'):
+            cfg.set('kattis', 'hostname', 'open.kattis.com')
+        return cfg
 
     def get_cfg(self, option: str, default: str | None = None, section: str = 'kattis'):
         # See cli.get_url
-        if self.config.has_option(section, option):
-            return self.config.get(section, option)
-        else:
+        value = self._cfg.get((section, option))
+        if value is None:
             return default
+        if '%' in value:
+            # Only the ConfigParser fallback lets these through; interpolate on read as it would
+            return self.config.get(section, option)
+        return value
 
     def get_url(self, option: str, default: str, section: str = 'kattis', hostname: str | None = None):
         # See cli.get_url
         if hostname is None:
-            hostname = self.config.get(section, 'hostname')
+            hostname = self.get_cfg('hostname', section=section)
+            if hostname is None:
+                raise cli.ConfigError(f'hostname missing from [{section}]')
         return self.get_cfg(option, f'https://{hostname}/{default}', section)
 
     ### response cache ###
@@ -186,14 +350,17 @@ class Kattis:
 
     def get(self,
             url: str,
-            data: dict[str, str] | None = None,
-            params: dict[str, str] | None = None,
+            data: Mapping[str, str] | None = None,
+            params: Mapping[str, str] | None = None,
             use_cached: bool = True):
+        if not self.is_logged_in():
+            # The cached login has expired or been invalidated; refresh it (and self.cookies) first
+            self.login()
         req = Request(method='get',
                       url=url,
                       headers=Kattis.HEADERS,
-                      data={} if data is None else data,
-                      params={} if params is None else params,
+                      data=data or _EMPTY_DICT,
+                      params=params or _EMPTY_DICT,
                       cookies=self.cookies)
         return self.cache.send(req, use_cached)
 
@@ -201,23 +368,27 @@ class Kattis:
 
     def login(self, use_cached: bool = True):
         # See cli.main
+        if not use_cached or not self.is_logged_in():
+            # The login request is about to be re-sent, so any cached cookies are about to go stale
+            self.__dict__.pop('cookies', None)
         resp = self.cache.send(self.login_request, use_cached)
         if resp.status_code == 403:
             raise Exception(f'403: bad credentials for {self.username}')
         elif resp.status_code == 404:
-            raise Exception(f'404: incorrect login URL {self.login_url()}')
+            raise Exception(f'404: incorrect login URL {self.login_url}')
         elif resp.status_code != 200:
             raise Exception(f'login failed with status {resp.status_code}')
         else:
             return resp
 
     def is_logged_in(self):
-        return self.login_request in self.cache
+        return self.cache.lookup(self._login_key) is not None
 
     def logout(self):
+        self.__dict__.pop('cookies', None)
         return self.cache.invalidate(self.login_request)
 
-    @property
+    @cached_property
     def login_request(self):
         # See cli.login
         if self.password is None and self.token is None:
@@ -227,13 +398,18 @@ class Kattis:
             data['password'] = self.password
         if self.token is not None:
             data['token'] = self.token
-        return Request('post', url=self.login_url(), data=data, headers=Kattis.HEADERS)
+        return Request('post', url=self.login_url, data=data, headers=Kattis.HEADERS)
+
+    @cached_property
+    def _login_key(self):
+        # login_request is cached, so its cache key can be too; is_logged_in runs on every get()
+        return self.cache.key(self.login_request)
 
     @property
     def login_response(self):
         return self.login(use_cached=True)
 
-    @property
+    @cached_property
     def cookies(self):
         return self.login_response.cookies
 
@@ -241,7 +417,10 @@ class Kattis:
 
     @property
     def username(self):
-        return self.config.get('user', 'username')
+        username = self.get_cfg('username', section='user')
+        if username is None:
+            raise cli.ConfigError('username missing from [user]')
+        return username
 
     @property
     def password(self):
@@ -257,78 +436,109 @@ class Kattis:
 
     ### basic urls ###
 
+    @cached_property
     def login_url(self):
         return self.get_url('loginurl', 'login')
 
+    @cached_property
     def logout_url(self):
         return self.get_url('logouturl', 'logout')
 
+    @cached_property
+    def _default_submit_url(self):
+        return self.get_url('submissionurl', 'submit')
+
     def submit_url(self, contest: Contest | str | None = None):
         if contest is None:
-            return self.get_url('submissionurl', 'submit')
+            return self._default_submit_url
         else:
             return f'{self.contest_url(contest)}/submit'
 
+    @cached_property
+    def _default_submissions_url(self):
+        return self.get_url('submissionsurl', 'submissions')
+
     def submissions_url(self, contest: Contest | str | None = None):
         if contest is None:
-            return self.get_url('submissionsurl', 'submissions')
+            return self._default_submissions_url
         else:
             return f'{self.contest_url(contest)}/submissions'
 
+    @cached_property
+    def _default_problems_url(self):
+        return self.get_url('problemsurl', 'problems')
+
     def problems_url(self, contest: Contest | str | None = None):
         if contest is None:
-            return self.get_url('problemsurl', 'problems')
+            return self._default_problems_url
         else:
             return f'{self.contest_url(contest)}/problems'
 
+    @cached_property
     def contests_url(self):
         return self.get_url('contestsurl', 'contests')
 
+    @cached_property
     def past_contests_url(self):
         return self.get_url('pastcontestsurl', 'past-contests')
 
+    @cached_property
     def challenge_url(self):
         return self.get_url('challengeurl', 'challenge')
 
+    @cached_property
     def users_url(self):
         return self.get_url('usersurl', 'users')
 
+    @cached_property
     def ranklist_url(self):
         return self.get_url('ranklisturl', 'ranklist')
 
+    @cached_property
     def affiliations_url(self):
         return self.get_url('affiliationsurl', 'affiliations')
 
+    @cached_property
     def countries_url(self):
         return self.get_url('countriesurl', 'countries')
 
+    @cached_property
     def authors_url(self):
         return self.get_url('authorsurl', 'problem-authors')
 
+    @cached_property
     def sources_url(self):
         return self.get_url('sourcesurl', 'problem-sources')
 
+    @cached_property
     def jobs_url(self):
         return self.get_url('jobsurl', 'jobs')
 
+    @cached_property
     def relay_url(self):
         return self.get_url('relayurl', 'relay')
 
+    @cached_property
     def languages_url(self):
         return self.get_url('languagesurl', 'languages')
 
+    @cached_property
     def info_url(self):
         return self.get_url('infourl', 'info')
 
+    @cached_property
     def policies_url(self):
         return self.get_url('policiesurl', 'policies')
 
+    @cached_property
     def search_url(self):
         return self.get_url('searchurl', 'search')
 
+    @cached_property
     def support_url(self):
         return self.get_url('supporturl', 'supporter')
 
+    @cached_property
     def request_affiliation_url(self):
         return self.get_url('requestaffiliationurl', 'request-affiliation')
 
@@ -344,12 +554,12 @@ class Kattis:
         return f'{self.problem_url(problem, contest)}/statistics'
 
     def contest_url(self, contest: Contest | str):
-        return f'{self.contests_url()}/{contest}'
+        return f'{self.contests_url}/{contest}'
 
     def user_url(self, user: str | User | None = None):
         if user is None:
             user = self.username
-        return f'{self.users_url()}/{user}'
+        return f'{self.users_url}/{user}'
 
     ### url params ###
 
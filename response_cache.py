@@ -1,17 +1,101 @@
-from requests import Request, Response
+import time
+
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+
+from requests import PreparedRequest, Request, Response
+from requests.adapters import HTTPAdapter
 from requests.sessions import Session
 
+type RequestKey = tuple[Hashable, ...]
+
+def _freeze(value: object) -> Hashable:
+    # Canonical hashable form of a request component; raises TypeError if there isn't one
+    if isinstance(value, CookieJar):
+        return tuple(sorted((c.domain, c.path, c.name, c.value) for c in value))
+    if isinstance(value, Mapping):
+        return tuple(sorted(((_freeze(k), _freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    raise TypeError(f'cannot key request component of type {type(value).__name__}')
+
+def _key(req: Request) -> RequestKey | None:
+    # None for requests that can't be keyed (file uploads, streamed bodies, ...); those bypass the cache
+    if req.files:
+        return None
+    try:
+        return (req.method.upper(),
+                req.url,
+                _freeze({k.lower(): v for k, v in req.headers.items()}),
+                _freeze(req.cookies),
+                _freeze(req.params),
+                _freeze(req.data),
+                _freeze(req.json))
+    except TypeError:
+        return None
+
 class ResponseCache:
-    def __init__(self):
-        self.cache: dict[Request, Response] = {}
+    def __init__(self, maxsize: int | None = 128, ttl: float | None = 600):
+        # LRU order, oldest first; values are (time.monotonic() when fetched, prepared request, response)
+        # Keys cover every input to req.prepare(), so a refetch of the same key can reuse the prepared request
+        self.cache: OrderedDict[RequestKey, tuple[float, PreparedRequest, Response]] = OrderedDict()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._session = Session()
+        # Cookies are always passed explicitly per request; don't let the shared session accumulate its own
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self._session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+    def _is_fresh(self, entry: tuple[float, PreparedRequest, Response]):
+        return self.ttl is None or time.monotonic() - entry[0] < self.ttl
+
+    @staticmethod
+    def key(req: Request):
+        return _key(req)
+
+    def lookup(self, key: RequestKey | None):
+        # Fresh cached response for a precomputed key, or None; lets hot callers skip rebuilding the key
+        if key is None:
+            return None
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry):
+            del self.cache[key]
+            return None
+        # A lookup counts as a use, or entries only ever probed (like the login) would age out
+        self.cache.move_to_end(key)
+        return entry[2]
 
     def __contains__(self, req: Request):
-        return req in self.cache
+        return self.lookup(_key(req)) is not None
+
+    def prepared(self, req: Request):
+        key = _key(req)
+        entry = None if key is None else self.cache.get(key)
+        return None if entry is None else entry[1]
 
     def invalidate(self, req: Request):
-        self.cache.pop(req, None)
+        key = _key(req)
+        if key is not None:
+            self.cache.pop(key, None)
 
     def send(self, req: Request, use_cached: bool = True):
-        if not use_cached or req not in self:
-            self.cache[req] = Session().send(req.prepare())
-        return self.cache[req]
+        key = _key(req)
+        if key is None:
+            return self._session.send(req.prepare())
+        entry = self.cache.get(key)
+        if entry is not None and use_cached and self._is_fresh(entry):
+            self.cache.move_to_end(key)
+            return entry[2]
+        prepared = req.prepare() if entry is None else entry[1]
+        resp = self._session.send(prepared)
+        self.cache[key] = (time.monotonic(), prepared, resp)
+        self.cache.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return resp